@@ -53,7 +53,7 @@ def balayagetableau():
 
         dataline["date"] = str(
             parse_datetime(
-                ligne.find_all("td")[1].text, dayfirst="True"
+                ligne.find_all("td")[1].text, dayfirst=True
             ).date()
         )
 
@@ -113,12 +113,12 @@ while 1:
     ope = dict()
     fini = 0
     if firstpass == 1:
-        lastdate = str(parse_datetime(liens[0].text, dayfirst="True").date())
+        lastdate = str(parse_datetime(liens[0].text, dayfirst=True).date())
     for lien in liens:
-        print(str(parse_datetime(lien.text, dayfirst="True").date()))
+        print(str(parse_datetime(lien.text, dayfirst=True).date()))
         print(config["GENERALI"]["last"])
         if (
-            str(parse_datetime(lien.text, dayfirst="True").date())
+            str(parse_datetime(lien.text, dayfirst=True).date())
             <= config["GENERALI"]["last"]
         ):
             print("OK, nous sommes à jour")
@@ -145,7 +145,7 @@ while 1:
 
         """Sauvegarde en fichier json"""
         filename = (
-            str(parse_datetime(lien.text, dayfirst="True").date())
+            str(parse_datetime(lien.text, dayfirst=True).date())
             + "-"
             + ope["ope"]
         )
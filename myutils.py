@@ -16,6 +16,10 @@ __license__ = "GNU GPLv2"
 import subprocess
 from typing import Dict
 
+# pdftotext produit de l'UTF-8, décodé explicitement comme tel : le résultat
+# ne dépend pas de la locale du système.
+PDFTOTEXT_COMMANDE = ["pdftotext", "-layout", "-enc", "UTF-8"]
+
 
 def is_pdfminer_installed() -> bool:
     """
@@ -45,8 +49,8 @@ def pdf_to_text(filename: str) -> str:
         ValueError: Si la conversion échoue.
     """
     try:
-        result = subprocess.run(["pdftotext", "-layout", filename, "-"], 
-                                capture_output=True, text=True, check=True)
+        result = subprocess.run(PDFTOTEXT_COMMANDE + [filename, "-"],
+                                capture_output=True, encoding="utf-8", check=True)
         return result.stdout
     except subprocess.CalledProcessError as e:
         raise ValueError(f"Erreur lors de la conversion du PDF : {e.stderr}")
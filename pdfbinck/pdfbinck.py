@@ -65,4 +65,4 @@ class pdfbinck(importer.ImporterProtocol):
         control = r"Date:\s*(\d{2}-\d{2}-\d{4})"
         match = re.search(control, text)
         if match:
-            return parse_datetime(match.group(1), dayfirst="True").date()
+            return parse_datetime(match.group(1), dayfirst=True).date()
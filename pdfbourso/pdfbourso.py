@@ -11,20 +11,66 @@ lorsqu'un outil externe n'est pas installé.
 __copyright__ = "Copyright (C) 2016 Martin Blais / Modifié en 2019 par Grostim"
 __license__ = "GNU GPLv2"
 
+import copy
+import os
 import re
 import datetime
 import logging
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Optional
 from dateutil.parser import parse as parse_datetime
 from ..myutils import pdf_to_text
 from beancount.core import amount, data, flags, position
 from beancount.ingest import importer
-from beancount.core.number import Decimal, D
+from beancount.core.number import Decimal
 from decimal import InvalidOperation
 
+# Décalage entre la date d'une opération et celle du solde qui la suit
+UN_JOUR = datetime.timedelta(days=1)
+
+@lru_cache(maxsize=512)
+def _parse_date(date_str: str) -> datetime.date:
+    """Convertit une date au format JJ/MM/AAAA, avec mise en cache des dates déjà vues.
+
+    Le format JJ/MM/AAAA, le seul présent dans les relevés, est décodé
+    directement ; dateutil ne sert plus que de solution de repli.
+    """
+    jour, _, reste = date_str.partition("/")
+    mois, _, annee = reste.partition("/")
+    if len(annee) == 4 and (jour + mois + annee).isdigit():
+        try:
+            return datetime.date(int(annee), int(mois), int(jour))
+        except ValueError:
+            pass
+    return parse_datetime(date_str, dayfirst=True).date()
+
+
+class _CacheLRU(OrderedDict):
+    """Dictionnaire borné : au-delà de taille entrées, la moins récemment utilisée est retirée."""
+
+    def __init__(self, taille: int):
+        super().__init__()
+        self.taille = taille
+
+    def __getitem__(self, key):
+        valeur = super().__getitem__(key)
+        self.move_to_end(key)
+        return valeur
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        if len(self) > self.taille:
+            self.popitem(last=False)
+
+
 class PDFBourso(importer.ImporterProtocol):
     """Un importateur pour les relevés PDF Boursorama."""
 
-    # Déplacer les constantes de classe en haut pour une meilleure lisibilité
+    # Déplacer les constantes de classe en haut pour une meilleure lisibilité.
+    # Les expressions régulières sont compilées une seule fois, au chargement
+    # du module.
     DOCUMENT_TYPES = {
         "DividendeBourse": r"COUPONS REMBOURSEMENTS :",
         "EspeceBourse": r"RELEVE COMPTE ESPECES :",
@@ -36,41 +82,128 @@ class PDFBourso(importer.ImporterProtocol):
         "Amortissement": r"tableau d'amortissement|Echéancier Prévisionnel|Échéancier Définitif"
     }
 
-    REGEX_COMPTE_COMPTE = r"\s*(\d{11})"
-    REGEX_COMPTE_CB = r"\s*((4979|4810)\*{8}\d{4})"
-    REGEX_COMPTE_AMORTISSEMENT = r"N(?:°|º) du crédit\s*:\s?(\d{5}\s?-\s?\d{11})"
-    REGEX_COMPTE_ESPECE_DIVIDENDE_BOURSE = r"40618\s\d{5}\s(\d{11})\s"
-    REGEX_COMPTE_BOURSE_OPCVM = r"\d{5}\s\d{5}\s(\d{11})\s"
-    REGEX_ISIN = r"Code ISIN\s:\s*([A-Z,0-9]{12})"
-
-    DATE_REGEX = r"(?:le\s|au\s*|Date départ\s*:\s)(\d*\/\d*\/\d*)"
-
-    REGEX_SOLDE_INITIAL = r"SOLDE\s(?:EN\sEUR\s+)?AU\s:(\s+)(\d{1,2}\/\d{2}\/\d{4})(\s+)((?:\d{1,3}\.)?\d{1,3},\d{2})"
-    REGEX_OPERATION_COMPTE = r"\d{1,2}\/\d{2}\/\d{4}\s(.*)\s(\d{1,2}\/\d{2}\/\d{4})\s(\s*)\s((?:\d{1,3}\.)?\d{1,3},\d{2})(?:(?:\n.\s{8,20})(.+?))?\n"
-    REGEX_SOLDE_FINAL = r"Nouveau solde en EUR :(\s+)((?:\d{1,3}\.)?(?:\d{1,3}\.)?\d{1,3},\d{2})"
-    REGEX_DATE_SOLDE_FINAL = r"(\d{1,2}\/\d{2}\/\d{4}).*40618"
-
-    REGEX_AMORTISSEMENT_OPERATION = r"(\d*/\d*/\d*)\s+(\d+.\d{2})\s+(\d+.\d{2})\s+(\d+.\d{2})\s+(\d+.\d{2})\s+(\d+.\d{2})\s+(\d+.\d{2})\s+(\d+.\d{2})\s+(\d+.\d{2})"
-
-    REGEX_CB_OPERATION = r"(\d{1,2}\/\d{2}\/\d{4})\s*CARTE\s(.*)\s((?:\d{1,3}\.)?\d{1,3},\d{2})"
-    REGEX_CB_SOLDE_FINAL = r"A VOTRE DEBIT LE\s(\d{1,2}\/\d{2}\/\d{4})\s*((?:\d{1,3}\.)?(?:\d{1,3}\.)?\d{1,3},\d{2})"
+    REGEX_DOCUMENT_TYPES = {
+        doc_type: re.compile(motif) for doc_type, motif in DOCUMENT_TYPES.items()
+    }
 
-    REGEX_ETR_MONTANT = r"Montant transaction\s*Montant transaction brut\s*Intérêts\s*total brut\s*Courtages\s*Montant transaction net\s*(\d{0,3}\s*\d{1,3}[,.]\d{1,3})\s([A-Z]{3})\s*(\d{0,3}\s*\d{1,3}[,.]\d{1,3})\s([A-Z]{3})\s*(\d{0,3}\s*\d{1,3}[,.]\d{1,3})\s([A-Z]{3})\s*(\d{0,3}\s*\d{1,3}[,.]\d{1,3})\s([A-Z]{3})\s*"
-    REGEX_BOURSE_FRAIS = r"Commission\s*Frais divers\s*Montant total des frais\s*(\d{0,3}\s*\d{1,3}[,.]\d{1,3})\s([A-Z]{3})\s*(\d{0,3}\s*\d{1,3}[,.]\d{1,3})\s([A-Z]{3})\s*(\d{0,3}\s*\d{1,3}[,.]\d{1,3})\s([A-Z]{3})\s*"
-    REGEX_BOURSE_DETAILS = r"locale d'exécution\s*Quantité\s*Informations sur la valeur\s*Informations sur l'exécution\s*(\d{1,2}\/\d{2}\/\d{4})\s*(\d{0,3}\s\d{1,3})\s*([\s\S]{0,20})?\s*"
-    REGEX_BOURSE_COURS = r"Cours exécuté :\s*(\d{0,3}\s\d{1,3}[,.]?\d{0,4})\s([A-Z]{1,3})"
-    REGEX_BOURSE_ACHAT = r"ACHAT COMPTANT"
+    # Libellés fixes dont l'un au moins figure dans toute correspondance du
+    # motif de DOCUMENT_TYPES. Ils sont recherchés avec l'opérateur in, bien
+    # plus rapide que le moteur d'expressions régulières ; le motif complet
+    # n'est évalué que si l'un d'eux est présent. Un type absent de cette
+    # table est testé avec son seul motif.
+    LIBELLES_DOCUMENT_TYPES = {
+        "DividendeBourse": ("COUPONS REMBOURSEMENTS :",),
+        "EspeceBourse": ("RELEVE COMPTE ESPECES :",),
+        "ETR": (" COMPTANT",),
+        "ACTION": (" COMPTANT",),
+        "OPCVM": ("OPERATION SUR OPC",),
+        "CB": ("Relevé de Carte",),
+        "Compte": ("BOURSORAMA BANQUE", "BOUSFRPPXXX", "Nanterre"),
+        "Amortissement": ("tableau d'amortissement", "Echéancier Prévisionnel", "Échéancier Définitif"),
+    }
 
-    REGEX_ACTION_MONTANT = r"Montant brut\s*Commission\s*Frais\s\(.\)\s*Montant net au crédit de votre compte\s*(\d{0,3}\s*\d{1,3}[,.]\d{1,3})\s([A-Z]{3})\s*(\d{0,3}\s*\d{1,3}[,.]\d{1,3})\s([A-Z]{3})\s*(?:(\d{0,3}\s*\d{1,3}[,.]\d{1,3})\s([A-Z]{3}))?\s*(\d{0,3}\s*\d{1,3}[,.]\d{1,3})\s([A-Z]{3})\s*"
+    REGEX_COMPTE_COMPTE = re.compile(r"\s*(\d{11})")
+    REGEX_COMPTE_CB = re.compile(r"\s*((4979|4810)\*{8}\d{4})")
+    REGEX_COMPTE_AMORTISSEMENT = re.compile(r"N(?:°|º) du crédit\s*:\s?(\d{5}\s?-\s?\d{11})")
+    REGEX_COMPTE_ESPECE_DIVIDENDE_BOURSE = re.compile(r"40618\s\d{5}\s(\d{11})\s")
+    REGEX_COMPTE_BOURSE_OPCVM = re.compile(r"\d{5}\s\d{5}\s(\d{11})\s")
+    REGEX_ISIN = re.compile(r"Code ISIN\s:\s*([A-Z,0-9]{12})")
+
+    # Motif du numéro de compte selon le type de relevé
+    REGEX_COMPTE_PAR_TYPE = {
+        "Compte": REGEX_COMPTE_COMPTE,
+        "CB": REGEX_COMPTE_CB,
+        "Amortissement": REGEX_COMPTE_AMORTISSEMENT,
+        "EspeceBourse": REGEX_COMPTE_ESPECE_DIVIDENDE_BOURSE,
+        "DividendeBourse": REGEX_COMPTE_ESPECE_DIVIDENDE_BOURSE,
+        "ETR": REGEX_COMPTE_BOURSE_OPCVM,
+        "OPCVM": REGEX_COMPTE_BOURSE_OPCVM,
+        "ACTION": REGEX_COMPTE_BOURSE_OPCVM,
+    }
 
-    REGEX_OPCVM_MONTANT = r"Montant brut\s*Droits d'entrée\s*Frais H.T.\s*T.V.A.\s*Montant net au débit de votre compte\s*(\d{0,3}\s*\d{1,3}[,.]\d{1,3})\s([A-Z]{3})\s*(\d{0,3}\s*\d{1,3}[,.]\d{1,3})\s([A-Z]{3})\s*(\d{0,3}\s*\d{1,3}[,.]\d{1,3})\s([A-Z]{3})\s*(\d{0,3}\s*\d{1,3}[,.]\d{1,3})\s([A-Z]{3})\s"
-    REGEX_OPCVM_DETAILS = r"(\d{1,2}\/\d{2}\/\d{4})\s*(\d{0,3}\s\d{1,3}[.,]?\d{0,4})\s*([\s\S]{0,20})?\s*"
-    REGEX_OPCVM_COURS = r"Valeur liquidative :\s*(\d{0,3}\s\d{1,3}[,.]\d{0,4})\s([A-Z]{1,3})"
-    REGEX_OPCVM_SOUSCRIPTION = r"SOUSCRIPTION"
+    DATE_REGEX = re.compile(r"(?:le\s|au\s*|Date départ\s*:\s)(\d*\/\d*\/\d*)")
+
+    REGEX_SOLDE_INITIAL = re.compile(r"SOLDE\s(?:EN\sEUR\s+)?AU\s:(\s+)(\d{1,2}\/\d{2}\/\d{4})(\s+)((?:\d{1,3}\.)?\d{1,3},\d{2})")
+    # Libellé non gourmand limité à la ligne courante, pour éviter les
+    # retours arrière caractère par caractère.
+    REGEX_OPERATION_COMPTE = re.compile(r"\d{1,2}\/\d{2}\/\d{4}\s([^\n]*?)\s(\d{1,2}\/\d{2}\/\d{4})\s(\s*)\s((?:\d{1,3}\.)?\d{1,3},\d{2})(?:(?:\n.\s{8,20})(.+?))?\n")
+    REGEX_SOLDE_FINAL = re.compile(r"Nouveau solde en EUR :(\s+)((?:\d{1,3}\.)?(?:\d{1,3}\.)?\d{1,3},\d{2})")
+    REGEX_DATE_SOLDE_FINAL = re.compile(r"(\d{1,2}\/\d{2}\/\d{4}).*40618")
+
+    REGEX_AMORTISSEMENT_OPERATION = re.compile(r"(\d{1,2}/\d{1,2}/\d{4})" + r"\s+(\d+[.,]\d{2})" * 8)
+
+    REGEX_CB_OPERATION = re.compile(r"(\d{1,2}\/\d{2}\/\d{4})\s*CARTE\s(.*)\s((?:\d{1,3}\.)?\d{1,3},\d{2})")
+    REGEX_CB_SOLDE_FINAL = re.compile(r"A VOTRE DEBIT LE\s(\d{1,2}\/\d{2}\/\d{4})\s*((?:\d{1,3}\.)?(?:\d{1,3}\.)?\d{1,3},\d{2})")
+
+    REGEX_ETR_MONTANT = re.compile(r"Montant transaction\s*Montant transaction brut\s*Intérêts\s*total brut\s*Courtages\s*Montant transaction net\s*(\d{0,3}\s*\d{1,3}[,.]\d{1,3})\s([A-Z]{3})\s*(\d{0,3}\s*\d{1,3}[,.]\d{1,3})\s([A-Z]{3})\s*(\d{0,3}\s*\d{1,3}[,.]\d{1,3})\s([A-Z]{3})\s*(\d{0,3}\s*\d{1,3}[,.]\d{1,3})\s([A-Z]{3})\s*")
+    REGEX_BOURSE_FRAIS = re.compile(r"Commission\s*Frais divers\s*Montant total des frais\s*(\d{0,3}\s*\d{1,3}[,.]\d{1,3})\s([A-Z]{3})\s*(\d{0,3}\s*\d{1,3}[,.]\d{1,3})\s([A-Z]{3})\s*(\d{0,3}\s*\d{1,3}[,.]\d{1,3})\s([A-Z]{3})\s*")
+    REGEX_BOURSE_DETAILS = re.compile(r"locale d'exécution\s*Quantité\s*Informations sur la valeur\s*Informations sur l'exécution\s*(\d{1,2}\/\d{2}\/\d{4})\s*(\d{0,3}\s\d{1,3})\s*([\s\S]{0,20})?\s*")
+    REGEX_BOURSE_COURS = re.compile(r"Cours exécuté :\s*(\d{0,3}\s\d{1,3}[,.]?\d{0,4})\s([A-Z]{1,3})")
+    REGEX_BOURSE_ACHAT = re.compile(r"ACHAT COMPTANT")
+
+    REGEX_ACTION_MONTANT = re.compile(r"Montant brut\s*Commission\s*Frais\s\(.\)\s*Montant net au crédit de votre compte\s*(\d{0,3}\s*\d{1,3}[,.]\d{1,3})\s([A-Z]{3})\s*(\d{0,3}\s*\d{1,3}[,.]\d{1,3})\s([A-Z]{3})\s*(?:(\d{0,3}\s*\d{1,3}[,.]\d{1,3})\s([A-Z]{3}))?\s*(\d{0,3}\s*\d{1,3}[,.]\d{1,3})\s([A-Z]{3})\s*")
+
+    REGEX_OPCVM_MONTANT = re.compile(r"Montant brut\s*Droits d'entrée\s*Frais H.T.\s*T.V.A.\s*Montant net au débit de votre compte\s*(\d{0,3}\s*\d{1,3}[,.]\d{1,3})\s([A-Z]{3})\s*(\d{0,3}\s*\d{1,3}[,.]\d{1,3})\s([A-Z]{3})\s*(\d{0,3}\s*\d{1,3}[,.]\d{1,3})\s([A-Z]{3})\s*(\d{0,3}\s*\d{1,3}[,.]\d{1,3})\s([A-Z]{3})\s")
+    REGEX_OPCVM_DETAILS = re.compile(r"(\d{1,2}\/\d{2}\/\d{4})\s*(\d{0,3}\s\d{1,3}[.,]?\d{0,4})\s*([\s\S]{0,20})?\s*")
+    REGEX_OPCVM_COURS = re.compile(r"Valeur liquidative :\s*(\d{0,3}\s\d{1,3}[,.]\d{0,4})\s([A-Z]{1,3})")
+    REGEX_OPCVM_SOUSCRIPTION = re.compile(r"SOUSCRIPTION")
+
+    REGEX_DIVIDENDE_DETAILS = re.compile(r"(\d{2}\/\d{2}\/\d{4})\s*(\d{1,5})\s*(.*)\s\(([A-Z]{2}[A-Z,0-9]{10})\)\s*(\d{0,3}\s\d{1,3}[,.]\d{2})\s*(\d{0,3}\s\d{1,3}[,.]\d{2})?\s*(\d{0,3}\s\d{1,3}[,.]\d{2})\s*(\d{0,3}\s\d{1,3}[,.]\d{2})\s*(\d{0,3}\s\d{1,3}[,.]\d{2})")
+
+    REGEX_ESPECE_BOURSE_SOLDE = re.compile(r"(\d*/\d*/\d*).*SOLDE\s*(\d{0,3}\s\d{1,3}[,.]\d{1,3})")
+
+    REGEX_ESPACES = re.compile(r"\s+")
+
+    # Préfixe littéral par lequel commence toute correspondance de ces motifs :
+    # il est d'abord localisé avec str.find, bien plus rapide que le moteur
+    # d'expressions régulières pour parcourir le texte.
+    PREFIXES_LITTERAUX = {
+        REGEX_SOLDE_INITIAL: "SOLDE",
+        REGEX_SOLDE_FINAL: "Nouveau solde en EUR :",
+        REGEX_CB_SOLDE_FINAL: "A VOTRE DEBIT LE",
+        REGEX_ETR_MONTANT: "Montant transaction",
+        REGEX_BOURSE_FRAIS: "Commission",
+        REGEX_BOURSE_DETAILS: "locale d'exécution",
+        REGEX_BOURSE_COURS: "Cours exécuté :",
+        REGEX_ACTION_MONTANT: "Montant brut",
+        REGEX_OPCVM_MONTANT: "Montant brut",
+        REGEX_OPCVM_COURS: "Valeur liquidative :",
+        REGEX_ISIN: "Code ISIN",
+    }
 
-    REGEX_DIVIDENDE_DETAILS = r"(\d{2}\/\d{2}\/\d{4})\s*(\d{1,5})\s*(.*)\s\(([A-Z]{2}[A-Z,0-9]{10})\)\s*(\d{0,3}\s\d{1,3}[,.]\d{2})\s*(\d{0,3}\s\d{1,3}[,.]\d{2})?\s*(\d{0,3}\s\d{1,3}[,.]\d{2})\s*(\d{0,3}\s\d{1,3}[,.]\d{2})\s*(\d{0,3}\s\d{1,3}[,.]\d{2})"
+    # Espaces insécables et fines remplacées par des espaces ordinaires, une
+    # fois pour tout le document, dès la conversion en texte.
+    TABLE_ESPACES = str.maketrans({"\xa0": " ", "\u202f": " ", "\u2009": " "})
+    # Table de nettoyage des montants : virgule décimale et séparateur de
+    # milliers.
+    TABLE_NOMBRE = str.maketrans({",": ".", " ": ""})
+    # Relevés de compte : le point sépare les milliers.
+    TABLE_MONTANT_COMPTE = str.maketrans({".": "", ",": "."})
+
+    # Champs numériques des avis d'opéré (ACTION, ETR, OPCVM)
+    CHAMPS_NUMERIQUES = (
+        "Montant Total", "Montant Frais", "Montant TTF", "Frais", "Droits", "Quantité", "Cours"
+    )
+
+    # Comptes et bénéficiaire fixes des échéances de prêt
+    COMPTE_PRELEVEMENT_PRET = "Actif:Boursorama:CCJoint"
+    COMPTE_INTERETS_PRET = "Depenses:Banque:Interet"
+    COMPTE_ASSURANCE_PRET = "Depenses:Banque:AssuEmprunt"
+    PAYEE_PRET = "ECH PRET:8028000060686223"
+
+    # Nom de fichier normalisé selon le type de relevé
+    NOMS_FICHIERS = {
+        "DividendeBourse": "Relevé Dividendes.pdf",
+        "EspeceBourse": "Relevé Espece.pdf",
+        "ETR": "Relevé Operation.pdf",
+        "OPCVM": "Relevé Operation.pdf",
+        "ACTION": "Relevé Operation.pdf",
+        "Compte": "Relevé Compte.pdf",
+        "CB": "Relevé CB.pdf",
+    }
 
-    REGEX_ESPECE_BOURSE_SOLDE = r"(\d*/\d*/\d*).*SOLDE\s*(\d{0,3}\s\d{1,3}[,.]\d{1,3})"
+    # Nombre de fichiers conservés par chacun des caches
+    TAILLE_CACHES = 32
 
     def __init__(self, accountList, debug: bool = False):
         """
@@ -85,32 +218,130 @@ class PDFBourso(importer.ImporterProtocol):
         self.accountList = accountList
         self.debug = debug
         self.logger = logging.getLogger(__name__)
+        # Caches par fichier (voir _cle_fichier), limités aux TAILLE_CACHES
+        # fichiers les plus récemment utilisés : la conversion PDF -> texte
+        # (appel à pdftotext) et la détection du type ne sont faites qu'une
+        # fois.
+        self._text_cache: Dict[tuple, str] = _CacheLRU(self.TAILLE_CACHES)
+        self._type_cache: Dict[tuple, Optional[str]] = _CacheLRU(self.TAILLE_CACHES)
+        # Entrées extraites par fichier : une nouvelle extraction du même
+        # relevé (import relancé depuis fava, par exemple) est immédiate.
+        # Elles sont valables pour la correspondance des comptes
+        # _comptes_extraits, copie de accountList.
+        self._entries_cache: Dict[tuple, list] = _CacheLRU(self.TAILLE_CACHES)
+        self._comptes_extraits: Optional[dict] = None
+        # Type du dernier fichier traité, None si non reconnu.
+        self.type: Optional[str] = None
         if debug:
             logging.basicConfig(level=logging.DEBUG)
         else:
             logging.basicConfig(level=logging.INFO)
 
-    def _debug(self, message: str):
-        self.logger.debug(message)
+    def _new_meta(self, file, document=None):
+        """
+        Crée les métadonnées communes d'une entrée extraite.
+
+        :param file: Le fichier traité
+        :type file: object
+        :param document: L'identifiant du document, omis si None
+        :type document: str, optional
+        :return: Les métadonnées
+        :rtype: dict
+        """
+        meta = data.new_metadata(file.name, 0)
+        meta["source"] = "pdfbourso"
+        if document is not None:
+            meta["document"] = document
+        return meta
+
+    def _debug(self, message: str, *args):
+        # Les arguments ne sont formatés que si le niveau DEBUG est actif.
+        self.logger.debug(message, *args)
 
     def _error(self, message: str):
         self.logger.error(message)
 
+    def _cle_fichier(self, file) -> tuple:
+        """
+        Retourne la clé des caches pour un fichier.
+
+        La date de modification et la taille font partie de la clé : un
+        relevé remplacé sous le même nom est de nouveau converti et analysé.
+
+        :param file: Le fichier à traiter
+        :type file: object
+        :return: Le nom, la date de modification et la taille du fichier
+        :rtype: tuple
+        """
+        try:
+            stat = os.stat(file.name)
+        except OSError:
+            return (file.name, None, None)
+        return (file.name, stat.st_mtime_ns, stat.st_size)
+
+    def _get_pdf_text(self, file, key: Optional[tuple] = None) -> str:
+        """Cache et retourne le texte du PDF, key étant la clé déjà calculée du fichier."""
+        if key is None:
+            key = self._cle_fichier(file)
+        if key not in self._text_cache:
+            self._text_cache[key] = file.convert(pdf_to_text).translate(self.TABLE_ESPACES)
+        return self._text_cache[key]
+
+    def _get_type(self, file, key: Optional[tuple] = None):
+        """Retourne le type du relevé, en ne l'identifiant qu'une fois par fichier."""
+        if key is None:
+            key = self._cle_fichier(file)
+        if key in self._type_cache:
+            self.type = self._type_cache[key]
+        else:
+            self._identify(file, key)
+        return self.type
+
     def identify(self, file):
+        return self._identify(file, self._cle_fichier(file))
+
+    def _identify(self, file, key: tuple):
+        """
+        Identifie le type du relevé.
+
+        :param file: Le fichier à traiter
+        :type file: object
+        :param key: La clé du fichier dans les caches
+        :type key: tuple
+        :return: True si le relevé est reconnu
+        :rtype: bool
+        """
         try:
             if file.mimetype() != "application/pdf":
+                self.type = None
                 return False
 
-            text = file.convert(pdf_to_text)
+            # Fichier déjà identifié : inutile de reparcourir le texte.
+            if key in self._type_cache:
+                self.type = self._type_cache[key]
+                return self.type is not None
+
+            text = self._get_pdf_text(file, key)
             
-            for doc_type, regex in self.DOCUMENT_TYPES.items():
-                if re.search(regex, text):
+            # Les types sont testés dans l'ordre de priorité de DOCUMENT_TYPES.
+            # Les libellés, lorsqu'ils sont connus, servent de filtre préalable.
+            for doc_type, regex in self.REGEX_DOCUMENT_TYPES.items():
+                libelles = self.LIBELLES_DOCUMENT_TYPES.get(doc_type)
+                if libelles and not any(libelle in text for libelle in libelles):
+                    continue
+                if regex.search(text):
                     self.type = doc_type
+                    self._type_cache[key] = doc_type
                     return True
-            
+
+            # Aucun type reconnu : mémorisé aussi, pour ne pas reparcourir le
+            # texte, et pour ne pas réutiliser le type d'un fichier précédent.
+            self.type = None
+            self._type_cache[key] = None
             return False
         except Exception as e:
             self._error(f"Erreur lors de l'identification du fichier : {str(e)}")
+            self.type = None
             return False
 
     def file_name(self, file):
@@ -122,19 +353,7 @@ class PDFBourso(importer.ImporterProtocol):
         :return: Le nom de fichier normalisé
         :rtype: str
         """
-        self.identify(file)
-        if self.type == "DividendeBourse":
-            return "Relevé Dividendes.pdf"
-        elif self.type == "EspeceBourse":
-            return "Relevé Espece.pdf"
-        elif self.type in["ETR","OPCVM","ACTION"]:
-            return "Relevé Operation.pdf"
-        elif self.type == "Compte":
-            return "Relevé Compte.pdf"
-        elif self.type == "CB":
-            return "Relevé CB.pdf"
-        else:
-            return "Boursorama.pdf"
+        return self.NOMS_FICHIERS.get(self._get_type(file), "Boursorama.pdf")
 
     def file_account(self, file):
         """
@@ -146,36 +365,35 @@ class PDFBourso(importer.ImporterProtocol):
         :rtype: str
         """
         # Recherche du numéro de compte dans le fichier.
-        text = file.convert(pdf_to_text)
-        self.identify(file)
-        
-        if self.type == "Compte":
-            control = self.REGEX_COMPTE_COMPTE
-        elif self.type == "CB":
-            control = self.REGEX_COMPTE_CB
-        elif self.type == "Amortissement":
-            control = self.REGEX_COMPTE_AMORTISSEMENT
-        elif self.type in ["EspeceBourse", "DividendeBourse"]:
-            control = self.REGEX_COMPTE_ESPECE_DIVIDENDE_BOURSE
-        elif self.type in ["ETR", "OPCVM", "ACTION"]:
-            control = self.REGEX_COMPTE_BOURSE_OPCVM
-        
+        key = self._cle_fichier(file)
+        if self._get_type(file, key) is None:
+            return None
+        return self._compte_releve(self._get_pdf_text(file, key))
 
-        match = re.search(control, text)
+    def _compte_releve(self, text: str):
+        """
+        Retourne le compte beancount du relevé de type self.type.
+
+        :param text: Le contenu texte du fichier
+        :type text: str
+        :return: Le numéro de compte ou l'identifiant du compte
+        :rtype: str
+        """
+        match = self.REGEX_COMPTE_PAR_TYPE[self.type].search(text)
         
         if match:
             self._debug(f"Numéro de compte extrait : {match.group(1)}")
-            compte = match.group(1)
+            compte = self.accountList[match.group(1)]
             if self.type in ["ETR", "OPCVM", "ACTION"]:
-                match_isin = re.search(self.REGEX_ISIN, text)
+                match_isin = self._search_prefixed(self.REGEX_ISIN, text)
                 if match_isin:
                     isin = match_isin.group(1)
-                    self._debug(f"Compte et ISIN : {self.accountList[compte]}:{isin}")
-                    return f"{self.accountList[compte]}:{isin}"
+                    self._debug(f"Compte et ISIN : {compte}:{isin}")
+                    return f"{compte}:{isin}"
             elif self.type in ["DividendeBourse", "EspeceDividende"]:
-                return f"{self.accountList[compte]}:Cash"
+                return f"{compte}:Cash"
             else:
-                return self.accountList[compte]
+                return compte
 
     def file_date(self, file):
         """
@@ -186,47 +404,137 @@ class PDFBourso(importer.ImporterProtocol):
         :return: La date du relevé
         :rtype: datetime.date
         """
-        text = file.convert(pdf_to_text)
-        match = re.search(self.DATE_REGEX, text)
+        return self._date_releve(self._get_pdf_text(file))
+
+    def _date_releve(self, text: str):
+        """
+        Retourne la date du relevé.
+
+        :param text: Le contenu texte du fichier
+        :type text: str
+        :return: La date du relevé
+        :rtype: datetime.date
+        """
+        match = self.DATE_REGEX.search(text)
         if match:
-            return parse_datetime(match.group(1), dayfirst=True).date()
+            return _parse_date(match.group(1))
         
 
+    def _search_from(self, regex, text: str, pos: int):
+        """
+        Recherche un bloc de l'avis d'opéré à partir de la fin du bloc précédent.
+
+        Les blocs (montants, ISIN, exécution, cours) se suivent dans le
+        document : la recherche reprend à pos. Si le bloc n'est pas trouvé
+        après pos, le texte est parcouru depuis le début.
+
+        :param regex: L'expression régulière compilée à rechercher
+        :type regex: re.Pattern
+        :param text: Le contenu texte du fichier
+        :type text: str
+        :param pos: La position de départ de la recherche
+        :type pos: int
+        :return: La correspondance trouvée ou None
+        :rtype: re.Match
+        """
+        match = self._search_prefixed(regex, text, pos)
+        if match is None and pos:
+            match = self._search_prefixed(regex, text, 0)
+        return match
+
+    def _search_prefixed(self, regex, text: str, pos: int = 0):
+        """
+        Équivalent de regex.search(text, pos) exploitant le préfixe littéral du motif.
+
+        :param regex: L'expression régulière compilée à rechercher
+        :type regex: re.Pattern
+        :param text: Le contenu texte du fichier
+        :type text: str
+        :param pos: La position de départ de la recherche
+        :type pos: int
+        :return: La correspondance trouvée ou None
+        :rtype: re.Match
+        """
+        prefixe = self.PREFIXES_LITTERAUX.get(regex)
+        if prefixe is None:
+            return regex.search(text, pos)
+        index = text.find(prefixe, pos)
+        while index >= 0:
+            match = regex.match(text, index)
+            if match:
+                return match
+            index = text.find(prefixe, index + 1)
+        return None
+
+    def _parse_montants(self, ope: dict):
+        """
+        Convertit en Decimal, une fois pour toutes, les champs numériques d'une opération.
+
+        :param ope: Les champs extraits de l'avis d'opéré
+        :type ope: dict
+        """
+        for champ in self.CHAMPS_NUMERIQUES:
+            if champ in ope:
+                ope[champ] = self._parse_decimal(ope[champ])
+
     def _parse_decimal(self, value: str) -> Decimal:
+        # Groupe optionnel absent : montant nul.
+        if not value:
+            return Decimal(0)
         try:
-            return Decimal(value.replace(",", ".").replace(" ", "").replace("\xa0", "").replace(r"\u00a", ""))
+            return Decimal(value.translate(self.TABLE_NOMBRE))
         except InvalidOperation:
             self._error(f"Impossible de convertir '{value}' en Decimal")
             return Decimal('0')
 
+    def _parse_montant(self, value: str) -> Decimal:
+        """
+        Convertit un montant au format 1.234,56 en Decimal.
+
+        Le point y sépare les milliers : TABLE_MONTANT_COMPTE le supprime
+        et remplace la virgule décimale, sans passer par _parse_decimal qui
+        le prendrait pour une virgule.
+
+        :param value: Le montant validé par l'expression régulière
+        :type value: str
+        :return: Le montant
+        :rtype: Decimal
+        """
+        return Decimal(value.translate(self.TABLE_MONTANT_COMPTE))
+
     def extract(self, file, existing_entries=None):
         try:
-            document = f"{self.file_date(file)} {self.file_name(file)}"
-            text = file.convert(pdf_to_text)
+            # Clé calculée une seule fois : un seul os.stat par extraction.
+            key = self._cle_fichier(file)
+            type_document = self._get_type(file, key)
+            if type_document is None:
+                # Relevé non reconnu : rien à extraire.
+                return []
+            if self.accountList != self._comptes_extraits:
+                # Correspondance des comptes modifiée : les extractions
+                # mémorisées ne sont plus valables.
+                self._entries_cache.clear()
+                self._comptes_extraits = dict(self.accountList)
+            if key in self._entries_cache:
+                # Copie profonde : l'appelant peut modifier les entrées et
+                # leurs métadonnées sans altérer le cache.
+                return copy.deepcopy(self._entries_cache[key])
+            text = self._get_pdf_text(file, key)
+            document = f"{self._date_releve(text)} {self.NOMS_FICHIERS.get(type_document, 'Boursorama.pdf')}"
             #self._debug(f"Contenu du PDF :\n{text}")
 
             entries = []
 
-            self._debug(f"Type de document : {self.type}")
-
-            extract_methods = {
-                "DividendeBourse": self._extract_dividende_bourse,
-                "EspeceBourse": self._extract_espece_bourse,
-                "ACTION": self._extract_action,
-                "ETR": self._extract_etr,
-                "OPCVM": self._extract_opcvm,
-                "Compte": self._extract_compte,
-                "Amortissement": self._extract_amortissement,
-                "CB": self._extract_cb
-            }
+            self._debug("Type de document : %s", type_document)
 
-            extract_method = extract_methods.get(self.type)
+            extract_method = self.METHODES_EXTRACTION.get(type_document)
             if extract_method:
-                entries.extend(extract_method(file, text, document))
-                self._debug(f"Execution de la methode: {extract_method}")
+                entries.extend(extract_method(self, file, text, document))
+                self._debug("Execution de la methode: %s", extract_method.__name__)
             else:
-                self._error(f"Méthode d'extraction non trouvée pour le type : {self.type}")
+                self._error(f"Méthode d'extraction non trouvée pour le type : {type_document}")
 
+            self._entries_cache[key] = copy.deepcopy(entries)
             return entries
         except Exception as e:
             self._error(f"Erreur lors de l'extraction des données : {str(e)}")
@@ -235,24 +543,23 @@ class PDFBourso(importer.ImporterProtocol):
     def _extract_dividende_bourse(self, file, text, document):
         try:
             entries = []
-            compte = self.file_account(file)
-            control = self.REGEX_DIVIDENDE_DETAILS
-            chunks = re.findall(control, text)
-            meta = data.new_metadata(file.name, 0)
-            meta["source"] = "pdfbourso"
-            meta["document"] = document
+            compte = self._compte_releve(text)
+            meta = self._new_meta(file, document)
             
-            for chunk in chunks:
+            # finditer : les lignes sont traitées au fil de l'eau, sans
+            # construire la liste complète des correspondances.
+            for match in self.REGEX_DIVIDENDE_DETAILS.finditer(text):
+                chunk = match.groups("")
                 try:
                     postings = [
-                        self._create_posting("Revenus:Dividendes", self._parse_decimal(chunk[4]) * -1, "EUR"),
-                        self._create_posting("Depenses:Impots:IR", self._parse_decimal(chunk[5] or '0') + self._parse_decimal(chunk[6]), "EUR"),
+                        self._create_posting("Revenus:Dividendes", -self._parse_decimal(chunk[4]), "EUR"),
+                        self._create_posting("Depenses:Impots:IR", self._parse_decimal(chunk[5]) + self._parse_decimal(chunk[6]), "EUR"),
                         self._create_posting(compte, self._parse_decimal(chunk[7]), "EUR")
                     ]
                     
                     transaction = self._create_transaction(
                         meta,
-                        parse_datetime(chunk[0], dayfirst=True).date(),
+                        _parse_date(chunk[0]),
                         f"Dividende pour {chunk[1]} titres {chunk[2]}",
                         None,
                         {chunk[3]},
@@ -281,20 +588,17 @@ class PDFBourso(importer.ImporterProtocol):
         :rtype: list
         """
         entries = []
-        print(self.file_account(file))
-        control = self.REGEX_ESPECE_BOURSE_SOLDE
-        chunks = re.findall(control, text)
-        meta = data.new_metadata(file.name, 0)
-        meta["source"] = "pdfbourso"
-        meta["document"] = document
+        compte = self._compte_releve(text) + ":Cash"  # type: ignore
+        self._debug("Compte : %s", compte)
+        meta = self._new_meta(file, document)
         
-        for chunk in chunks:
-            print(chunk[0])
-            print(chunk[1])
+        for match in self.REGEX_ESPECE_BOURSE_SOLDE.finditer(text):
+            chunk = match.groups("")
+            self._debug("Solde au %s : %s", chunk[0], chunk[1])
             balance = data.Balance(
                 meta,
-                parse_datetime(chunk[0], dayfirst=True).date(),
-                self.file_account(file) + ":Cash", # type: ignore
+                _parse_date(chunk[0]),
+                compte,
                 amount.Amount(self._parse_decimal(chunk[1]), "EUR"),
                 None,
                 None,
@@ -318,18 +622,21 @@ class PDFBourso(importer.ImporterProtocol):
         """
         entries = []
         # Identification du numéro de compte
-        control = self.REGEX_COMPTE_BOURSE_OPCVM
-        match = re.search(control, text)
+        match = self.REGEX_COMPTE_BOURSE_OPCVM.search(text)
         if match:
             compte = match.group(1)
 
         # Si débogage, affichage de l'extraction
         self._debug(f"Numéro de compte extrait : {compte}")
+        compte_beancount = self.accountList[compte]
 
         ope = dict()
+        # Position de fin du dernier bloc trouvé
+        pos = 0
 
-        match = re.search(self.REGEX_ACTION_MONTANT, text)
+        match = self._search_from(self.REGEX_ACTION_MONTANT, text, pos)
         if match:
+            pos = match.end()
             ope["Montant Total"] = match.group(7)
             ope["currency Total"] = match.group(8)
             ope["Montant TTF"] = match.group(5) or "0.0"
@@ -344,70 +651,74 @@ class PDFBourso(importer.ImporterProtocol):
         self._debug(f"TTF : {ope['Montant TTF']}")
         self._debug(f"Devise Frais : {ope['currency Frais']}")
 
-        match = re.search(self.REGEX_ISIN, text)
+        match = self._search_from(self.REGEX_ISIN, text, pos)
         if match:
+            pos = match.end()
             ope["ISIN"] = match.group(1)
         else:
             self.logger.info("ISIN introuvable")
 
-        match = re.search(self.REGEX_BOURSE_DETAILS, text)
+        match = self._search_from(self.REGEX_BOURSE_DETAILS, text, pos)
         if match:
+            pos = match.end()
             ope["Date"] = match.group(1)
             ope["Quantité"] = match.group(2)
             ope["Designation"] = match.group(3)
         else:
             self.logger.info("Date, Qté, Designation introuvable")
 
-        match = re.search(self.REGEX_BOURSE_COURS, text)
+        match = self._search_from(self.REGEX_BOURSE_COURS, text, pos)
         if match:
+            pos = match.end()
             ope["Cours"] = match.group(1)
             ope["currency Cours"] = match.group(2)
         else:
             self.logger.info("Cours introuvable")
         self._debug(f"Date de l'opération : {ope['Date']}")
 
-        match = re.search(self.REGEX_BOURSE_ACHAT, text)
+        match = self.REGEX_BOURSE_ACHAT.search(text)
         if match:
             ope["Achat"] = True
         else:
             ope["Achat"] = False
 
+        # Conversion unique des montants en Decimal
+        self._parse_montants(ope)
+
         # Creation de la transaction
         postings = [
             self._create_posting(
-                self.accountList[compte] + ":" + ope["ISIN"],
-                self._parse_decimal(ope["Quantité"]) * (1 if ope["Achat"] else -1),
+                compte_beancount + ":" + ope["ISIN"],
+                ope["Quantité"] * (1 if ope["Achat"] else -1),
                 ope["ISIN"],
                 cost=position.Cost(
-                    self._parse_decimal(ope["Cours"]),
+                    ope["Cours"],
                     ope["currency Cours"],
                     None, # type: ignore
                     None,
                 ) if ope["Achat"] else None,
                 price=amount.Amount(
-                    self._parse_decimal(ope["Cours"]),
+                    ope["Cours"],
                     ope["currency Cours"],
                 ),
             ),
             self._create_posting(
-                self.accountList[compte] + ":Cash",
-                self._parse_decimal(ope["Montant Total"]) * (-1 if ope["Achat"] else 1),
+                compte_beancount + ":Cash",
+                ope["Montant Total"] * (-1 if ope["Achat"] else 1),
                 ope["currency Total"],
             ),
             self._create_posting(
                 "Depenses:Banque:Frais",
-                self._parse_decimal(ope["Montant Frais"]) + self._parse_decimal(ope["Montant TTF"]),
+                ope["Montant Frais"] + ope["Montant TTF"],
                 ope["currency Frais"],
             ),
         ]
 
-        meta = data.new_metadata(file.name, 0)
-        meta["source"] = "pdfbourso"
-        meta["document"] = document
+        meta = self._new_meta(file, document)
 
         transaction = self._create_transaction(
             meta,
-            parse_datetime(ope["Date"], dayfirst=True).date(),
+            _parse_date(ope["Date"]),
             ope["Designation"] or "inconnu",
             ope["ISIN"],
             {ope["ISIN"]},
@@ -432,18 +743,21 @@ class PDFBourso(importer.ImporterProtocol):
         """
         entries = []
         # Identification du numéro de compte
-        control = self.REGEX_COMPTE_BOURSE_OPCVM
-        match = re.search(control, text)
+        match = self.REGEX_COMPTE_BOURSE_OPCVM.search(text)
         if match:
             compte = match.group(1)
 
         # Si débogage, affichage de l'extraction
         self._debug(f"Numéro de compte extrait : {compte}")
+        compte_beancount = self.accountList[compte]
 
         ope = dict()
+        # Position de fin du dernier bloc trouvé
+        pos = 0
 
-        match = re.search(self.REGEX_ETR_MONTANT, text)
+        match = self._search_from(self.REGEX_ETR_MONTANT, text, pos)
         if match:
+            pos = match.end()
             ope["Montant Total"] = match.group(5)
             ope["currency Total"] = match.group(6)
         else:
@@ -451,77 +765,82 @@ class PDFBourso(importer.ImporterProtocol):
         self._debug(f"Montant Total : {ope['Montant Total']}")
         self._debug(f"Devise Total : {ope['currency Total']}")
 
-        match = re.search(self.REGEX_BOURSE_FRAIS, text)
+        match = self._search_from(self.REGEX_BOURSE_FRAIS, text, pos)
         if match:
+            pos = match.end()
             ope["Frais"] = match.group(5)
             ope["currency Frais"] = match.group(6)
         else:
             self.logger.info("Frais introuvable")
 
-        match = re.search(self.REGEX_ISIN, text)
+        match = self._search_from(self.REGEX_ISIN, text, pos)
         if match:
+            pos = match.end()
             ope["ISIN"] = match.group(1)
         else:
             self.logger.info("ISIN introuvable")
 
-        match = re.search(self.REGEX_BOURSE_DETAILS, text)
+        match = self._search_from(self.REGEX_BOURSE_DETAILS, text, pos)
         if match:
+            pos = match.end()
             ope["Date"] = match.group(1)
             ope["Quantité"] = match.group(2)
             ope["Designation"] = match.group(3)
         else:
             self.logger.info("Date, Qté, Designation introuvable")
 
-        match = re.search(self.REGEX_BOURSE_COURS, text)
+        match = self._search_from(self.REGEX_BOURSE_COURS, text, pos)
         if match:
+            pos = match.end()
             ope["Cours"] = match.group(1)
             ope["currency Cours"] = match.group(2)
         else:
             self.logger.info("Cours introuvable")
         self._debug(f"Date de l'opération : {ope['Date']}")
 
-        match = re.search(self.REGEX_BOURSE_ACHAT, text)
+        match = self.REGEX_BOURSE_ACHAT.search(text)
         if match:
             ope["Achat"] = True
         else:
             ope["Achat"] = False
 
+        # Conversion unique des montants en Decimal
+        self._parse_montants(ope)
+
         # Creation de la transaction
         postings = [
             self._create_posting(
-                self.accountList[compte] + ":" + ope["ISIN"],
-                self._parse_decimal(ope["Quantité"]) * (1 if ope["Achat"] else -1),
+                compte_beancount + ":" + ope["ISIN"],
+                ope["Quantité"] * (1 if ope["Achat"] else -1),
                 ope["ISIN"],
                 cost=position.Cost(
-                    self._parse_decimal(ope["Cours"]),
+                    ope["Cours"],
                     ope["currency Cours"],
                     None, # type: ignore
                     None,
                 ) if ope["Achat"] else None,
                 price=amount.Amount(
-                    self._parse_decimal(ope["Cours"]),
+                    ope["Cours"],
                     ope["currency Cours"],
                 ),
             ),
             self._create_posting(
-                self.accountList[compte] + ":Cash",
-                self._parse_decimal(ope["Montant Total"]) * (-1 if ope["Achat"] else 1),
+                compte_beancount + ":Cash",
+                ope["Montant Total"] * (-1 if ope["Achat"] else 1),
                 ope["currency Total"],
             ),
             self._create_posting(
                 "Depenses:Banque:Frais",
-                self._parse_decimal(ope["Frais"]),
+                ope["Frais"],
                 ope["currency Frais"],
             ),
         ]
 
-        meta = data.new_metadata(file.name, 0)
-        meta["source"] = "pdfbourso"
-        meta["document"] = document
+        meta = self._new_meta(file, document)
 
         transaction = self._create_transaction(
             meta,
-            parse_datetime(ope["Date"], dayfirst=True).date(),
+            _parse_date(ope["Date"]),
             ope["Designation"] or "inconnu",
             ope["ISIN"],
             {ope["ISIN"]},
@@ -546,18 +865,21 @@ class PDFBourso(importer.ImporterProtocol):
         """
         entries = []
         # Identification du numéro de compte
-        control = self.REGEX_COMPTE_BOURSE_OPCVM
-        match = re.search(control, text)
+        match = self.REGEX_COMPTE_BOURSE_OPCVM.search(text)
         if match:
             compte = match.group(1)
 
         # Si débogage, affichage de l'extraction
         self._debug(f"Numéro de compte extrait : {compte}")
+        compte_beancount = self.accountList[compte]
 
         ope = dict()
+        # Position de fin du dernier bloc trouvé
+        pos = 0
 
-        match = re.search(self.REGEX_OPCVM_MONTANT, text)
+        match = self._search_from(self.REGEX_OPCVM_MONTANT, text, pos)
         if match:
+            pos = match.end()
             ope["Montant Total"] = match.group(7)
             ope["currency Total"] = match.group(8)
             ope["Frais"] = match.group(5)
@@ -569,13 +891,14 @@ class PDFBourso(importer.ImporterProtocol):
         self._debug(f"Montant Total : {ope['Montant Total']}")
         self._debug(f"Devise Total : {ope['currency Total']}")
 
-        match = re.search(self.REGEX_ISIN, text)
+        match = self._search_from(self.REGEX_ISIN, text, pos)
         if match:
+            pos = match.end()
             ope["ISIN"] = match.group(1)
         else:
             self.logger.info("ISIN introuvable")
 
-        match = re.search(self.REGEX_OPCVM_DETAILS, text)
+        match = self.REGEX_OPCVM_DETAILS.search(text)
         if match:
             ope["Date"] = match.group(1)
             ope["Quantité"] = match.group(2)
@@ -583,56 +906,58 @@ class PDFBourso(importer.ImporterProtocol):
         else:
             self.logger.info("Date, Qté, Designation introuvable")
 
-        match = re.search(self.REGEX_OPCVM_COURS, text)
+        match = self._search_from(self.REGEX_OPCVM_COURS, text, pos)
         if match:
+            pos = match.end()
             ope["Cours"] = match.group(1)
             ope["currency Cours"] = match.group(2)
         else:
             self.logger.info("Cours introuvable")
         self._debug(f"Cours : {ope['Cours']}")
 
-        match = re.search(self.REGEX_OPCVM_SOUSCRIPTION, text)
+        match = self.REGEX_OPCVM_SOUSCRIPTION.search(text)
         if match:
             ope["Achat"] = True
         else:
             ope["Achat"] = False
 
+        # Conversion unique des montants en Decimal
+        self._parse_montants(ope)
+
         # Creation de la transaction
         postings = [
             self._create_posting(
-                self.accountList[compte] + ":" + ope["ISIN"],
-                self._parse_decimal(ope["Quantité"]) * (1 if ope["Achat"] else -1),
+                compte_beancount + ":" + ope["ISIN"],
+                ope["Quantité"] * (1 if ope["Achat"] else -1),
                 ope["ISIN"],
                 cost=position.Cost(
-                    self._parse_decimal(ope["Cours"]),
+                    ope["Cours"],
                     ope["currency Cours"],
                     None, # type: ignore
                     None,
                 ) if ope["Achat"] else None,
                 price=amount.Amount(
-                    self._parse_decimal(ope["Cours"]),
+                    ope["Cours"],
                     ope["currency Cours"],
                 ),
             ),
             self._create_posting(
-                self.accountList[compte] + ":Cash",
-                self._parse_decimal(ope["Montant Total"]) * (-1 if ope["Achat"] else 1),
+                compte_beancount + ":Cash",
+                ope["Montant Total"] * (-1 if ope["Achat"] else 1),
                 ope["currency Total"],
             ),
             self._create_posting(
                 "Depenses:Banque:Frais",
-                self._parse_decimal(ope["Frais"]) + self._parse_decimal(ope["Droits"]),
+                ope["Frais"] + ope["Droits"],
                 ope["currency Frais"],
             ),
         ]
 
-        meta = data.new_metadata(file.name, 0)
-        meta["source"] = "pdfbourso"
-        meta["document"] = document
+        meta = self._new_meta(file, document)
 
         transaction = self._create_transaction(
             meta,
-            parse_datetime(ope["Date"], dayfirst=True).date(),
+            _parse_date(ope["Date"]),
             ope["Designation"] or "inconnu",
             ope["ISIN"],
             {ope["ISIN"]},
@@ -657,143 +982,76 @@ class PDFBourso(importer.ImporterProtocol):
         """
         entries = []
         # Identification du numéro de compte
-        control = self.REGEX_COMPTE_COMPTE
-        match = re.search(control, text)
+        match = self.REGEX_COMPTE_COMPTE.search(text)
         if match:
             compte = match.group(0).split(" ")[-1]
 
         # Si debogage, affichage de l'extraction
         self._debug(f"Numéro de compte extrait : {compte}")
+        compte_beancount = self.accountList[compte]
 
         # Affichage du solde initial
-        match = re.search(self.REGEX_SOLDE_INITIAL, text)
+        match = self._search_prefixed(self.REGEX_SOLDE_INITIAL, text)
         datebalance = ""
-        balance = ""
+        balance = Decimal(0)
         if match:
-            datebalance = parse_datetime(
-                match.group(2), dayfirst=True
-            ).date() + datetime.timedelta(days=1)
+            datebalance = _parse_date(match.group(2)) + UN_JOUR
             longueur = (
                 len(match.group(1))
                 + len(match.group(3))
                 + len(match.group(2))
                 + len(match.group(4))
             )
-            balance = match.group(4).replace(".", "").replace(",", ".")
+            balance = self._parse_montant(match.group(4))
             if longueur < 84:
                 # Si la distance entre les 2 champs est petite, alors, c'est un débit.
-                balance = "-" + balance
+                balance = -balance
 
-        meta = data.new_metadata(file.name, 0)
-        meta["source"] = "pdfbourso"
-        meta["document"] = document
+        meta = self._new_meta(file, document)
 
         entries.append(
             data.Balance(
                 meta,
                 datebalance,
-                self.accountList[compte],
-                amount.Amount(D(balance), "EUR"),
+                compte_beancount,
+                amount.Amount(balance, "EUR"),
                 None,
                 None,
             ) # type: ignore
         )
 
-        chunks = re.findall(self.REGEX_OPERATION_COMPTE, text)
-
-        # Si debogage, affichage de l'extraction
-        self._debug(f"Chunks extraits : {chunks}")
-
-        index = 0
-        for chunk in chunks:
-            index += 1
-            meta = data.new_metadata(file.name, index)
-            meta["source"] = "pdfbourso"
-            meta["document"] = document
-            ope = dict()
-
-            # Si debogage, affichage de l'extraction
-            self._debug(f"Chunk extrait : {chunk}")
+        # Métadonnées communes, copiées pour chaque opération
+        meta_modele = self._new_meta(file, document)
 
-            ope["date"] = chunk[1]
-            # Si debogage, affichage de l'extraction
-            self._debug(f"Date de l'opération : {ope['date']}")
-
-            ope["montant"] = chunk[3].replace(".", "").replace(",", ".")
-            # Si debogage, affichage de l'extraction
-            self._debug(f"Montant de l'opération : {ope['montant']}")
-
-            # Longueur de l'espace intercalaire
-            longueur = (
-                len(chunk[0])
-                + len(chunk[1])
-                + len(chunk[2])
-                + len(chunk[3])
-            )
-            # Si debogage, affichage de l'extraction
-            self._debug(f"Longueur de l'espace intercalaire : {longueur}")
-
-            if longueur > 148:
-                ope["type"] = "Credit"
-            else:
-                ope["type"] = "Debit"
-                ope["montant"] = "-" + ope["montant"]
-            # Si débogage, affichage de l'extraction
-            self._debug(f"Montant de l'opération : {ope['montant']}")
-
-            ope["payee"] = re.sub(r"\s+", " ", chunk[0])
-            # Si debogage, affichage de l'extraction
-            self._debug(f"Payee : {ope['payee']}")
-
-            ope["narration"] = re.sub(r"\s+", " ", chunk[4])
-            # Si debogage, affichage de l'extraction
-            self._debug(f"Narration : {ope['narration']}")
-
-            # Creation de la transaction
-            postings = [
-                self._create_posting(
-                    self.accountList[compte],
-                    Decimal(ope["montant"]),
-                    "EUR",
-                ),
-            ]
-            transaction = self._create_transaction(
-                meta,
-                parse_datetime(ope["date"], dayfirst=True).date(),
-                ope["payee"] or "inconnu",
-                ope["narration"],
-                data.EMPTY_SET,
-                postings,
-            )
-            entries.append(transaction)
+        entries.extend(
+            self._build_operation_compte(match, index, meta_modele, compte_beancount)
+            for index, match in enumerate(self.REGEX_OPERATION_COMPTE.finditer(text), 1)
+        )
 
         # Recherche du solde final
-        match = re.search(self.REGEX_SOLDE_FINAL, text)
+        match = self._search_prefixed(self.REGEX_SOLDE_FINAL, text)
         if match:
-            balance = match.group(2).replace(".", "").replace(",", ".")
+            balance = self._parse_montant(match.group(2))
             longueur = len(match.group(1))
             self.logger.debug(f"Balance : {balance}")
             self.logger.debug(f"Longueur : {longueur}")
             if longueur < 84:
                 # Si la distance entre les 2 champs est petite, alors, c'est un débit.
-                balance = "-" + balance
-            # Recherche de la date du solde final
-            match = re.search(self.REGEX_DATE_SOLDE_FINAL, text)
+                balance = -balance
+            # Recherche de la date du solde final, en pied de relevé : la
+            # recherche reprend après le solde plutôt qu'au début du texte.
+            match = self._search_from(self.REGEX_DATE_SOLDE_FINAL, text, match.end())
             if match:
-                datebalance = parse_datetime(
-                    match.group(1), dayfirst=True
-                ).date()
+                datebalance = _parse_date(match.group(1))
                 self.logger.debug(f"Date balance : {datebalance}")
-                meta = data.new_metadata(file.name, 0)
-                meta["source"] = "pdfbourso"
-                meta["document"] = document
+                meta = self._new_meta(file, document)
 
                 entries.append(
                     data.Balance(
                         meta,
                         datebalance,
-                        self.accountList[compte],
-                        amount.Amount(D(balance), "EUR"),
+                        compte_beancount,
+                        amount.Amount(balance, "EUR"),
                         None,
                         None,
                     ) # type: ignore
@@ -801,6 +1059,47 @@ class PDFBourso(importer.ImporterProtocol):
 
         return entries
 
+    def _build_operation_compte(self, match, index, meta_modele, compte):
+        """
+        Construit la transaction correspondant à une ligne de relevé de compte.
+
+        :param match: La correspondance de REGEX_OPERATION_COMPTE
+        :type match: re.Match
+        :param index: Le numéro de la ligne dans le relevé
+        :type index: int
+        :param meta_modele: Les métadonnées communes au relevé
+        :type meta_modele: dict
+        :param compte: Le compte beancount du relevé
+        :type compte: str
+        :return: Un objet Transaction
+        :rtype: data.Transaction
+        """
+        # Une ligne extraite : libellé, date, espace intercalaire, montant
+        # et complément de libellé.
+        chunk = match.groups("")
+        payee, date_ope, intercalaire, montant, narration = chunk
+        self._debug("Chunk extrait : %s", chunk)
+
+        meta = dict(meta_modele)
+        meta["lineno"] = index
+
+        # La longueur de l'espace intercalaire indique la colonne du
+        # montant : au-delà de 148 caractères, c'est un crédit.
+        longueur = len(payee) + len(date_ope) + len(intercalaire) + len(montant)
+        montant = self._parse_montant(montant)
+        if longueur <= 148:
+            montant = -montant
+        self._debug("Longueur : %s, montant de l'opération : %s", longueur, montant)
+
+        return self._create_transaction(
+            meta,
+            _parse_date(date_ope),
+            self.REGEX_ESPACES.sub(" ", payee) or "inconnu",
+            self.REGEX_ESPACES.sub(" ", narration),
+            data.EMPTY_SET,
+            [self._create_posting(compte, montant, "EUR")],
+        )
+
     def _extract_amortissement(self, file, text, document):
         """
         Extrait les données pour les opérations d'amortissement.
@@ -815,68 +1114,69 @@ class PDFBourso(importer.ImporterProtocol):
         :rtype: list
         """
         entries = []
+        # Test littéral préalable : sans numéro de crédit, inutile de
+        # parcourir le texte avec les expressions régulières.
+        if "du crédit" not in text:
+            self.logger.info("Numéro de crédit introuvable")
+            return entries
+
         # Identification du numéro de compte
-        match = re.search(self.REGEX_COMPTE_AMORTISSEMENT, text)
+        match = self.REGEX_COMPTE_AMORTISSEMENT.search(text)
         if match:
             compte = match.group(1)
 
         # Si debogage, affichage de l'extraction
         self._debug(f"Numéro de compte : {compte}")
 
-        chunks = re.findall(self.REGEX_AMORTISSEMENT_OPERATION, text)
+        # Métadonnées communes, copiées pour chaque échéance
+        meta_modele = self._new_meta(file)
 
-        # Si debogage, affichage de l'extraction
-        self._debug(f"Chunks : {chunks}")
-
-        index = 0
-        for chunk in chunks:
-            index += 1
-            meta = data.new_metadata(file.name, index)
-            meta["source"] = "pdfbourso"
-            ope = dict()
-            ope["date"] = parse_datetime(chunk[0], dayfirst=True).date()
-            ope["prelevement"] = amount.Amount(
-                self._parse_decimal(chunk[1]) * -1, "EUR"
-            )
-            ope["amortissement"] = amount.Amount(
-                self._parse_decimal(chunk[2]), "EUR"
-            )
-            ope["interet"] = amount.Amount(
-                self._parse_decimal(chunk[3]), "EUR"
-            )
-            ope["assurance"] = amount.Amount(
-                self._parse_decimal(chunk[4]), "EUR"
-            )
-            ope["CRD"] = amount.Amount(
-                self._parse_decimal(chunk[7])*-1, "EUR"
-            )
+        # Invariants de la boucle, liés une seule fois
+        create_posting = self._create_posting
+        parse_decimal = self._parse_decimal
+        compte_pret = self.accountList[compte]
+
+        for index, match in enumerate(
+            self.REGEX_AMORTISSEMENT_OPERATION.finditer(text), 1
+        ):
+            # Une échéance : date, prélèvement, amortissement, intérêts,
+            # assurance, deux colonnes ignorées, capital restant dû et une
+            # dernière colonne ignorée.
+            chunk = match.groups()
+            date_ope, prelevement, amortissement, interet, assurance, _, _, crd, _ = chunk
+            self._debug("Échéance extraite : %s", chunk)
+
+            meta = dict(meta_modele)
+            meta["lineno"] = index
+            date_ope = _parse_date(date_ope)
 
             # Creation de la transaction
             postings = [
-                self._create_posting("Actif:Boursorama:CCJoint", ope["prelevement"].number, "EUR"),
-                self._create_posting(self.accountList[compte], ope["amortissement"].number, "EUR"),
-                self._create_posting("Depenses:Banque:Interet", ope["interet"].number, "EUR"),
-                self._create_posting("Depenses:Banque:AssuEmprunt", ope["assurance"].number, "EUR"),
+                create_posting(
+                    self.COMPTE_PRELEVEMENT_PRET, -parse_decimal(prelevement), "EUR"
+                ),
+                create_posting(compte_pret, parse_decimal(amortissement), "EUR"),
+                create_posting(self.COMPTE_INTERETS_PRET, parse_decimal(interet), "EUR"),
+                create_posting(self.COMPTE_ASSURANCE_PRET, parse_decimal(assurance), "EUR"),
             ]
             transaction = self._create_transaction(
                 meta,
-                ope["date"],
-                "ECH PRET:8028000060686223",
+                date_ope,
+                self.PAYEE_PRET,
                 "",
                 data.EMPTY_SET,
                 postings,
             )
-            entries.append(transaction)
-            entries.append(
-                data.Balance(
-                    meta,
-                    ope["date"] + datetime.timedelta(1),
-                    self.accountList[compte],
-                    ope["CRD"],
-                    None,
-                    None,
-                ) # type: ignore
-            )
+            balance = data.Balance(
+                meta,
+                date_ope + UN_JOUR,
+                compte_pret,
+                amount.Amount(-parse_decimal(crd), "EUR"),
+                None,
+                None,
+            ) # type: ignore
+            # L'échéance et le capital restant dû qui la suit
+            entries.extend((transaction, balance))
 
         return entries
 
@@ -894,82 +1194,78 @@ class PDFBourso(importer.ImporterProtocol):
         :rtype: list
         """
         entries = []
+        # Test littéral préalable : ni opération ni solde, inutile de
+        # parcourir le texte avec les expressions régulières.
+        if "CARTE" not in text and "A VOTRE DEBIT LE" not in text:
+            self.logger.info("Aucune opération CB ni solde dans le relevé")
+            return entries
+
         # Identification du numéro de compte
-        match = re.search(self.REGEX_COMPTE_CB, text)
+        match = self.REGEX_COMPTE_CB.search(text)
         if match:
             compte = match.group(1)
 
         # Si debogage, affichage de l'extraction
         self._debug(f"Numéro de compte : {compte}")
-
-        chunks = re.findall(self.REGEX_CB_OPERATION, text)
+        compte_carte = self.accountList[compte]
+        create_posting = self._create_posting
 
         # Si debogage, affichage de l'extraction
-        self._debug(f"Expression régulière utilisée : {self.REGEX_CB_OPERATION}")
-        self._debug(f"Chunks extraits : {chunks}")
-
-        index = 0
-        for chunk in chunks:
-            index += 1
-            meta = data.new_metadata(file.name, index)
-            meta["source"] = "pdfbourso"
-            meta["document"] = document
-            ope = dict()
+        self._debug(f"Expression régulière utilisée : {self.REGEX_CB_OPERATION.pattern}")
 
-            # Si debogage, affichage de l'extraction
-            self._debug(f"Chunk extrait : {chunk}")
+        # Métadonnées communes, copiées pour chaque opération
+        meta_modele = self._new_meta(file, document)
 
-            ope["date"] = chunk[0]
-            # Si debogage, affichage de l'extraction
-            self._debug(f"Date de l'opération : {ope['date']}")
+        # Position de fin de la dernière opération trouvée
+        fin_operations = 0
+        for index, match in enumerate(self.REGEX_CB_OPERATION.finditer(text), 1):
+            # Une ligne extraite : date, libellé et montant
+            chunk = match.groups()
+            date_ope, payee, montant = chunk
+            meta = dict(meta_modele)
+            meta["lineno"] = index
 
-            ope["montant"] = self._parse_decimal(chunk[2])*-1
             # Si debogage, affichage de l'extraction
-            self._debug(f"Montant de l'opération : {ope['montant']}")
+            self._debug("Chunk extrait : %s", chunk)
 
-            ope["payee"] = re.sub(r"\s+", " ", chunk[1])
+            montant = -self._parse_montant(montant)
+            payee = self.REGEX_ESPACES.sub(" ", payee)
             # Si debogage, affichage de l'extraction
-            self._debug(f"Payee : {ope['payee']}")
+            self._debug("Date : %s, montant : %s, payee : %s", date_ope, montant, payee)
 
             # Creation de la transaction
             postings = [
-                self._create_posting(
-                    self.accountList[compte],
-                    ope["montant"],
-                    "EUR",
-                ),
+                create_posting(compte_carte, montant, "EUR"),
             ]
             transaction = self._create_transaction(
                 meta,
-                parse_datetime(ope["date"], dayfirst=True).date(),
-                ope["payee"] or "inconnu",
+                _parse_date(date_ope),
+                payee or "inconnu",
                 None,
                 data.EMPTY_SET,
                 postings,
             )
             entries.append(transaction)
+            fin_operations = match.end()
 
-        # Recherche du solde final
-        match = re.search(self.REGEX_CB_SOLDE_FINAL, text)
+        # Recherche du solde final, qui suit la dernière opération
+        match = self._search_from(self.REGEX_CB_SOLDE_FINAL, text, fin_operations)
         if match:
-            balance = self._parse_decimal(match.group(2))*-1
+            balance = -self._parse_montant(match.group(2))
             self._debug(f"Balance : {balance}")
-            # Recherche de la date du solde final
-            match = re.search(self.REGEX_DATE_SOLDE_FINAL, text)
+            # Recherche de la date du solde final, en pied de relevé : la
+            # recherche reprend après le solde plutôt qu'au début du texte.
+            match = self._search_from(self.REGEX_DATE_SOLDE_FINAL, text, match.end())
             if match:
-                datebalance = parse_datetime(
-                    match.group(1), dayfirst=True
-                ).date()
+                datebalance = _parse_date(match.group(1))
                 self._debug(f"Date de la balance : {datebalance}")
-                meta = data.new_metadata(file.name, 0)
-                meta["source"] = "pdfbourso"
-                meta["document"] = document
+                meta = self._new_meta(file, document)
 
                 entries.append(
                     data.Balance(
                         meta,
                         datebalance,
-                        self.accountList[compte],
+                        compte_carte,
                         amount.Amount(balance, "EUR"),
                         None,
                         None,
@@ -995,13 +1291,9 @@ class PDFBourso(importer.ImporterProtocol):
         :return: Un objet Posting
         :rtype: data.Posting
         """
+        # Construction positionnelle : account, units, cost, price, flag, meta
         return data.Posting(
-            account=account,
-            units=amount.Amount(amount_value, currency),
-            cost=cost,
-            flag=None,
-            meta=None,
-            price=price,
+            account, amount.Amount(amount_value, currency), cost, price, None, None
         )
 
     def _create_transaction(self, meta, date, payee, narration, tags, postings):
@@ -1023,13 +1315,22 @@ class PDFBourso(importer.ImporterProtocol):
         :return: Un objet Transaction
         :rtype: data.Transaction
         """
+        # Construction positionnelle : meta, date, flag, payee, narration,
+        # tags, links, postings
         return data.Transaction(
-            meta=meta,
-            date=date,
-            flag=flags.FLAG_OKAY,
-            payee=payee,
-            narration=narration,
-            tags=tags,
-            links=data.EMPTY_SET,
-            postings=postings,
+            meta, date, flags.FLAG_OKAY, payee, narration, tags, data.EMPTY_SET, postings
         ) # type: ignore
+
+    # Méthode d'extraction selon le type de relevé. Les fonctions, définies
+    # plus haut, sont appelées avec self : ni getattr ni méthode liée à
+    # chaque extraction.
+    METHODES_EXTRACTION = {
+        "DividendeBourse": _extract_dividende_bourse,
+        "EspeceBourse": _extract_espece_bourse,
+        "ACTION": _extract_action,
+        "ETR": _extract_etr,
+        "OPCVM": _extract_opcvm,
+        "Compte": _extract_compte,
+        "Amortissement": _extract_amortissement,
+        "CB": _extract_cb,
+    }
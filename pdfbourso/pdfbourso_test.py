@@ -4,9 +4,13 @@ __copyright__ = (
 )
 __license__ = "GNU GPLv2"
 
+import datetime
+import os
+import re
 from os import path
 import pytest
 
+from beancount.core.number import Decimal
 from beancount.ingest import regression_pytest as regtest
 from . import pdfbourso
 
@@ -44,3 +48,279 @@ IMPORTER = pdfbourso.PDFBourso(ACCOUNTLIST, debug=True)
 )
 class TestImporter(regtest.ImporterTestBase):
     pass
+
+
+# Motif d'origine des opérations de compte, à libellé gourmand
+REGEX_OPERATION_COMPTE_ORIGINE = re.compile(
+    r"\d{1,2}\/\d{2}\/\d{4}\s(.*)\s(\d{1,2}\/\d{2}\/\d{4})\s(\s*)\s((?:\d{1,3}\.)?\d{1,3},\d{2})(?:(?:\n.\s{8,20})(.+?))?\n"
+)
+
+OPERATIONS_COMPTE = (
+    "x 04/01/2020  CARTE FOO   04/01/2020   5,00\n"
+    "  02/01/2020  PRLV 03/01 X  02/01/2020      45,00\n"
+    "           REF 12\n"
+    "03/01/2020 VIR 1.234,00 ABC" + " " * 100 + "03/01/2020   2.500,00\n"
+    "foo 01/01/2020\n"
+    "  12,00\n"
+)
+
+
+class TestRegexOperationCompte:
+    """
+    Tests pour le motif des opérations de compte.
+    """
+
+    def test_captures_identiques(self):
+        """
+        Teste que le libellé non gourmand capture les mêmes groupes que le
+        motif d'origine, y compris pour une ligne dont la date n'est pas en tête.
+        """
+        captures = pdfbourso.PDFBourso.REGEX_OPERATION_COMPTE.findall(OPERATIONS_COMPTE)
+        assert len(captures) == 3
+        assert captures == REGEX_OPERATION_COMPTE_ORIGINE.findall(OPERATIONS_COMPTE)
+
+
+class FichierFactice:
+    """
+    Simule un FileMemo de beancount : le texte est fourni directement, ou
+    lu dans le fichier s'il n'est pas précisé.
+    """
+
+    def __init__(self, name, text=None):
+        self.name = name
+        self.text = text
+
+    def mimetype(self):
+        return "application/pdf"
+
+    def convert(self, fonction):
+        if self.text is None:
+            with open(self.name, encoding="utf-8") as fichier:
+                return fichier.read()
+        return self.text
+
+
+RELEVE_CB = (
+    "Relevé de Carte\n"
+    " 4979********1979   M TEST\n"
+    " 03/01/2020 CARTE 02/01/20 SNCF VOYAGES           45,00\n"
+    " 04/01/2020 CARTE 03/01/20 GRAND MAGASIN          1.120,00\n"
+    " A VOTRE DEBIT LE 31/01/2020   1.165,00\n"
+    " 31/01/2020   40618 80280 00040754305\n"
+)
+
+
+class TestCacheExtraction:
+    """
+    Tests pour la mémorisation des extractions.
+    """
+
+    def test_fichier_remplace(self, tmp_path):
+        """
+        Teste qu'un relevé remplacé sous le même nom est de nouveau extrait.
+
+        Args:
+            tmp_path: Fixture pytest fournissant un répertoire temporaire.
+        """
+        chemin = tmp_path / "releve.pdf"
+        chemin.write_text(RELEVE_CB, encoding="utf-8")
+        importer = pdfbourso.PDFBourso(ACCOUNTLIST)
+        fichier = FichierFactice(str(chemin))
+        assert len(importer.extract(fichier)) == 3
+
+        chemin.write_text(
+            RELEVE_CB.replace("SNCF VOYAGES   ", "SNCF VOYAGES 2 "
+                              ).replace(" 04/01/2020", " 05/01/2020"),
+            encoding="utf-8",
+        )
+        os.utime(chemin, ns=(0, 0))
+        entries = importer.extract(FichierFactice(str(chemin)))
+        assert entries[0].payee.startswith("02/01/20 SNCF VOYAGES 2")
+        assert entries[1].date == datetime.date(2020, 1, 5)
+
+    def test_copie_des_entrees(self, tmp_path):
+        """
+        Teste que les entrées renvoyées depuis le cache sont indépendantes.
+
+        Args:
+            tmp_path: Fixture pytest fournissant un répertoire temporaire.
+        """
+        importer = pdfbourso.PDFBourso(ACCOUNTLIST)
+        fichier = FichierFactice(str(tmp_path / "releve_cb.pdf"), RELEVE_CB)
+        entries = importer.extract(fichier)
+        entries[0].meta["modifie"] = True
+        entries.clear()
+
+        entries = importer.extract(fichier)
+        assert len(entries) == 3
+        assert "modifie" not in entries[0].meta
+
+    def test_un_seul_stat(self, tmp_path, monkeypatch):
+        """
+        Teste qu'une extraction n'appelle os.stat qu'une fois.
+
+        Args:
+            tmp_path: Fixture pytest fournissant un répertoire temporaire.
+            monkeypatch: Fixture pytest permettant de remplacer os.stat.
+        """
+        chemin = tmp_path / "releve.pdf"
+        chemin.write_text(RELEVE_CB, encoding="utf-8")
+        appels = []
+        stat = os.stat
+
+        def stat_compte(nom):
+            appels.append(nom)
+            return stat(nom)
+
+        monkeypatch.setattr(pdfbourso.os, "stat", stat_compte)
+        importer = pdfbourso.PDFBourso(ACCOUNTLIST)
+        assert len(importer.extract(FichierFactice(str(chemin)))) == 3
+        assert len(appels) == 1
+        assert len(importer.extract(FichierFactice(str(chemin)))) == 3
+        assert len(appels) == 2
+
+    def test_taille_bornee(self, tmp_path):
+        """
+        Teste que les caches ne conservent que les fichiers les plus récents.
+
+        Args:
+            tmp_path: Fixture pytest fournissant un répertoire temporaire.
+        """
+        importer = pdfbourso.PDFBourso(ACCOUNTLIST)
+        taille = importer.TAILLE_CACHES
+        for numero in range(taille + 5):
+            fichier = FichierFactice(str(tmp_path / f"releve_{numero}.pdf"), RELEVE_CB)
+            assert len(importer.extract(fichier)) == 3
+        assert len(importer._text_cache) == taille
+        assert len(importer._type_cache) == taille
+        assert len(importer._entries_cache) == taille
+
+    def test_comptes_modifies(self, tmp_path):
+        """
+        Teste qu'une modification de accountList invalide les extractions mémorisées.
+
+        Args:
+            tmp_path: Fixture pytest fournissant un répertoire temporaire.
+        """
+        comptes = dict(ACCOUNTLIST)
+        importer = pdfbourso.PDFBourso(comptes)
+        fichier = FichierFactice(str(tmp_path / "releve_cb.pdf"), RELEVE_CB)
+        assert importer.extract(fichier)[2].account == "Passif:Boursorama:CBJoint"
+
+        comptes["4979********1979"] = "Passif:Boursorama:CBAutre"
+        assert importer.extract(fichier)[2].account == "Passif:Boursorama:CBAutre"
+
+
+class TestMontants:
+    """
+    Tests pour la conversion des montants à séparateur de milliers.
+    """
+
+    def test_parse_montant(self):
+        """
+        Teste la conversion d'un montant au format 1.234,56.
+        """
+        importer = pdfbourso.PDFBourso(ACCOUNTLIST)
+        assert importer._parse_montant("1.120,00") == Decimal("1120.00")
+        assert importer._parse_montant("45,00") == Decimal("45.00")
+
+    def test_extraction_cb(self, tmp_path):
+        """
+        Teste qu'une ligne CB et un solde avec séparateur de milliers sont extraits.
+
+        Args:
+            tmp_path: Fixture pytest fournissant un répertoire temporaire.
+        """
+        importer = pdfbourso.PDFBourso(ACCOUNTLIST)
+        entries = importer.extract(FichierFactice(str(tmp_path / "releve_cb.pdf"), RELEVE_CB))
+        assert [entry.postings[0].units.number for entry in entries[:2]] == [
+            Decimal("-45.00"), Decimal("-1120.00")
+        ]
+        assert entries[2].amount.number == Decimal("-1165.00")
+        assert entries[2].account == "Passif:Boursorama:CBJoint"
+
+
+class TestPdfNonReconnu:
+    """
+    Tests pour les PDF qui ne sont pas des relevés Boursorama.
+    """
+
+    def test_pdf_non_reconnu(self, tmp_path):
+        """
+        Teste qu'un PDF inconnu n'hérite pas du type du fichier précédent.
+
+        Args:
+            tmp_path: Fixture pytest fournissant un répertoire temporaire.
+        """
+        importer = pdfbourso.PDFBourso(ACCOUNTLIST)
+        releve = FichierFactice(str(tmp_path / "releve_cb.pdf"), RELEVE_CB)
+        assert importer.identify(releve)
+
+        inconnu = FichierFactice(str(tmp_path / "inconnu.pdf"), "Un document quelconque\n")
+        assert importer.identify(inconnu) is False
+        assert importer.file_name(inconnu) == "Boursorama.pdf"
+        assert importer.file_account(inconnu) is None
+        assert importer.extract(inconnu) == []
+
+    def test_pdf_non_reconnu_seul(self, tmp_path):
+        """
+        Teste un PDF inconnu traité sans identification préalable.
+
+        Args:
+            tmp_path: Fixture pytest fournissant un répertoire temporaire.
+        """
+        importer = pdfbourso.PDFBourso(ACCOUNTLIST)
+        inconnu = FichierFactice(str(tmp_path / "inconnu.pdf"), "Un document quelconque\n")
+        assert importer.file_name(inconnu) == "Boursorama.pdf"
+        assert importer.file_account(inconnu) is None
+        assert importer.extract(inconnu) == []
+        assert importer.identify(inconnu) is False
+
+
+class TestFiltresPrealables:
+    """
+    Tests pour les tests littéraux préalables aux motifs CB et amortissement.
+    """
+
+    def test_amortissement_sans_numero_credit(self, tmp_path):
+        """
+        Teste qu'un tableau sans « du crédit » ne donne aucune entrée.
+
+        Args:
+            tmp_path: Fixture pytest fournissant un répertoire temporaire.
+        """
+        importer = pdfbourso.PDFBourso(ACCOUNTLIST)
+        fichier = FichierFactice(str(tmp_path / "amortissement.pdf"), "")
+        texte = "Echéancier Prévisionnel\n 05/02/2020 250,00 200,00 40,00 10,00 0,00 0,00 9800,00 0,00\n"
+        assert importer._extract_amortissement(fichier, texte, "amortissement.pdf") == []
+
+    def test_cb_sans_operation_ni_solde(self, tmp_path):
+        """
+        Teste qu'un relevé sans « CARTE » ni « A VOTRE DEBIT LE » ne donne aucune entrée.
+
+        Args:
+            tmp_path: Fixture pytest fournissant un répertoire temporaire.
+        """
+        importer = pdfbourso.PDFBourso(ACCOUNTLIST)
+        fichier = FichierFactice(str(tmp_path / "releve_cb.pdf"), "")
+        texte = "Relevé de Carte\n Aucune opération ce mois-ci\n"
+        assert importer._extract_cb(fichier, texte, "releve_cb.pdf") == []
+
+    def test_cb_carte_en_fin_de_ligne(self, tmp_path):
+        """
+        Teste qu'une ligne où CARTE est suivi d'un saut de ligne est extraite.
+
+        Args:
+            tmp_path: Fixture pytest fournissant un répertoire temporaire.
+        """
+        importer = pdfbourso.PDFBourso(ACCOUNTLIST)
+        fichier = FichierFactice(str(tmp_path / "releve_cb.pdf"), "")
+        texte = (
+            "Relevé de Carte\n"
+            " 4979********1979   M TEST\n"
+            " 03/01/2020 CARTE\n"
+            "02/01/20 SNCF VOYAGES           45,00\n"
+        )
+        entries = importer._extract_cb(fichier, texte, "releve_cb.pdf")
+        assert len(entries) == 1
+        assert entries[0].postings[0].units.number == Decimal("-45.00")
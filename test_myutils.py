@@ -63,6 +63,25 @@ class TestPdfToText:
         monkeypatch.setattr(subprocess, "run", mock_run)
         assert pdf_to_text("test.pdf") == "Texte converti"
 
+    def test_encodage_utf8(self, monkeypatch):
+        """
+        Teste que la sortie de pdftotext est demandée et décodée en UTF-8.
+
+        Args:
+            monkeypatch: Fixture pytest pour modifier temporairement le comportement.
+        """
+        appels = []
+
+        def mock_run(args, **kwargs):
+            appels.append((args, kwargs))
+            return subprocess.CompletedProcess(args=args, returncode=0, stdout="Relevé")
+
+        monkeypatch.setattr(subprocess, "run", mock_run)
+        assert pdf_to_text("test.pdf") == "Relevé"
+        args, kwargs = appels[0]
+        assert args[args.index("-enc") + 1] == "UTF-8"
+        assert kwargs["encoding"] == "utf-8"
+
     def test_failed_conversion(self, monkeypatch):
         """
         Teste une conversion PDF échouée.